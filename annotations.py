@@ -0,0 +1,135 @@
+import json
+import os
+from datetime import datetime
+
+
+# ============================
+# COCO ANNOTATION WRITER
+# ============================
+class CocoAnnotationWriter:
+    """Streams a COCO detection file while samples are generated.
+
+    Images are written to the target file as they arrive, annotations are
+    buffered in a side file and appended on close, so memory stays flat no
+    matter how many samples are generated.
+    """
+
+    CATEGORIES = [
+        {"id": 1, "name": "text", "supercategory": "field"},
+        {"id": 2, "name": "checkmark", "supercategory": "field"},
+        {"id": 3, "name": "word", "supercategory": "text"},
+    ]
+
+    def __init__(self, path):
+        self.path = path
+        self.next_image_id = 1
+        self.next_annotation_id = 1
+        self._first_annotation = True
+
+        self._file = open(path, "w", encoding="utf-8")
+        self._annotations_path = path + ".part"
+        self._annotations = open(self._annotations_path, "w+", encoding="utf-8")
+
+        info = {
+            "description": "FormGenX synthetic forms",
+            "date_created": datetime.utcnow().isoformat() + "Z",
+        }
+        self._file.write('{"info": ' + json.dumps(info, ensure_ascii=False))
+        self._file.write(', "categories": ' + json.dumps(self.CATEGORIES))
+        self._file.write(', "images": [')
+
+    def add_image(self, image_path, width, height, fields):
+        image_id = self.next_image_id
+        self.next_image_id += 1
+
+        image = {
+            "id": image_id,
+            "file_name": os.path.basename(image_path),
+            "width": width,
+            "height": height,
+        }
+        if image_id > 1:
+            self._file.write(", ")
+        self._file.write(json.dumps(image, ensure_ascii=False))
+
+        for field in fields:
+            for annotation in self._field_annotations(field):
+                self._write_annotation(image_id, annotation)
+        return image_id
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.write('], "annotations": [')
+        self._annotations.seek(0)
+        for line in self._annotations:
+            self._file.write(line)
+        self._file.write("]}\n")
+
+        self._file.close()
+        self._annotations.close()
+        os.remove(self._annotations_path)
+        self._file = None
+        print("Saved annotations:", self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ============================
+    # HELPERS
+    # ============================
+    def _field_annotations(self, field):
+        if field.get("bbox"):
+            category = 1 if field["type"] == "text" else 2
+            yield {"category_id": category, "field": field["name"], "bbox": field["bbox"]}
+
+        for word in field.get("words", []):
+            yield {
+                "category_id": 3,
+                "field": field["name"],
+                "text": word["text"],
+                "bbox": word,
+            }
+
+        for child in field.get("children", []):
+            if child.get("bbox"):
+                yield {
+                    "category_id": 2,
+                    "field": field["name"],
+                    "child": child["name"],
+                    "bbox": child["bbox"],
+                }
+
+    def _write_annotation(self, image_id, annotation):
+        box = annotation.pop("bbox")
+        width = box["x2"] - box["x1"]
+        height = box["y2"] - box["y1"]
+
+        annotation = {
+            "id": self.next_annotation_id,
+            "image_id": image_id,
+            "bbox": [box["x1"], box["y1"], width, height],
+            "area": width * height,
+            "iscrowd": 0,
+            **annotation,
+        }
+        self.next_annotation_id += 1
+
+        prefix = "" if self._first_annotation else ", "
+        self._first_annotation = False
+        self._annotations.write(prefix + json.dumps(annotation, ensure_ascii=False) + "\n")
+
+
+def union_boxes(boxes):
+    boxes = [b for b in boxes if b]
+    if not boxes:
+        return None
+    return {
+        "x1": min(b["x1"] for b in boxes),
+        "y1": min(b["y1"] for b in boxes),
+        "x2": max(b["x2"] for b in boxes),
+        "y2": max(b["y2"] for b in boxes),
+    }
@@ -1,3 +1,4 @@
+import copy
 import cv2
 import json
 import os
@@ -5,7 +6,15 @@ import random
 import getpass
 from datetime import datetime
 
+import numpy as np
+
+from annotations import CocoAnnotationWriter, union_boxes
 from dataGenFunctions import DataGenFunctions
+from variants import OutputVariant
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+CHECK_THICKNESS = 2
+INK_CACHE_SIZE = 4096
 
 
 # ============================
@@ -50,6 +59,9 @@ class Generator:
         self.style_default = global_cfg.get("default_style", "computer")
         self.scale = global_cfg.get("font_scale", 0.6)
         self.thickness = global_cfg.get("font_thickness", 1)
+        self.export_annotations = global_cfg.get("export_annotations", False)
+        self.annotations_file = global_cfg.get("annotations_file", "annotations.json")
+        self._ink_cache = {}
 
         self.field_cfg = self.gen_conf.get("fields", {})
 
@@ -60,7 +72,23 @@ class Generator:
 
         self.data_gen = DataGenFunctions(self.data_store)
 
-        os.makedirs(cfg.outputfolder, exist_ok=True)
+        self.variants = self._load_variants()
+        for variant in self.variants:
+            os.makedirs(variant.folder(cfg.outputfolder), exist_ok=True)
+
+    def _load_variants(self):
+        entries = self.gen_conf.get("output_variants", [])
+        if not entries:
+            return [OutputVariant(fmt=self.cfg.outputtype)]
+
+        variants = [
+            OutputVariant.from_config(entry, index, self.cfg.outputtype)
+            for index, entry in enumerate(entries)
+        ]
+        names = [variant.name for variant in variants]
+        if len(set(names)) != len(names):
+            raise ValueError("Output variant names must be unique: " + ", ".join(names))
+        return variants
 
     # ============================
     # FUNCTION LOOKUP
@@ -82,15 +110,39 @@ class Generator:
     # MAIN LOOP
     # ============================
     def run(self):
-        for idx in range(self.cfg.gennum):
-            img = self.template_img.copy()
-            fields = self.render_sample(img)
-
-            image_path = self._build_output_path(idx)
-            self.save_image(img, image_path)
-
-            metadata = self.build_metadata(fields, idx, image_path)
-            self.save_metadata(metadata, image_path)
+        coco_writers = {}
+        if self.export_annotations:
+            for variant in self.variants:
+                coco_writers[variant.name] = CocoAnnotationWriter(
+                    os.path.join(variant.folder(self.cfg.outputfolder), self.annotations_file)
+                )
+
+        try:
+            for idx in range(self.cfg.gennum):
+                img = self.template_img.copy()
+                fields = self.render_sample(img)
+
+                for variant in self.variants:
+                    self.save_variant(variant, img, fields, idx, coco_writers.get(variant.name))
+        finally:
+            for coco in coco_writers.values():
+                coco.close()
+
+    def save_variant(self, variant, img, fields, sample_index, coco=None):
+        out = variant.render(img)
+        image_path = self._build_output_path(sample_index, variant)
+        self.save_image(out, image_path)
+
+        info = variant.describe(out, img)
+        variant_fields = variant.scale_fields(fields, info)
+
+        metadata = self.build_metadata(variant_fields, sample_index, image_path)
+        if variant.name:
+            metadata["variant"] = info
+        self.save_metadata(metadata, image_path)
+
+        if coco:
+            coco.add_image(image_path, info["width"], info["height"], variant_fields)
 
     # ============================
     # SAMPLE RENDERING
@@ -160,7 +212,13 @@ class Generator:
             record["status"] = "no_value_generated"
             return record
 
-        self.draw_text(img, field, value, style)
+        ink = self.draw_text(img, field, value, style)
+        if ink:
+            bbox, words = ink
+            if bbox:
+                record["bbox"] = bbox
+            if words:
+                record["words"] = words
         record["drawn"] = True
         record["status"] = "rendered"
         return record
@@ -178,7 +236,9 @@ class Generator:
         record["value"] = value
 
         if value:
-            self.draw_checkbox(img, field)
+            bbox = self.draw_checkbox(img, field)
+            if bbox:
+                record["bbox"] = bbox
             record["drawn"] = True
             record["status"] = "checked"
         else:
@@ -210,10 +270,18 @@ class Generator:
         record["value"] = selection
 
         if selection:
+            child_boxes = {}
             for child_name in selection:
                 child_field = child_map.get(child_name)
                 if child_field:
-                    self.draw_checkbox(img, child_field)
+                    child_boxes[child_name] = self.draw_checkbox(img, child_field)
+            if self.export_annotations:
+                for info in child_infos:
+                    if child_boxes.get(info["name"]):
+                        info["bbox"] = child_boxes[info["name"]]
+                bbox = union_boxes(child_boxes.values())
+                if bbox:
+                    record["bbox"] = bbox
             record["drawn"] = True
             record["status"] = "selection"
         else:
@@ -230,9 +298,11 @@ class Generator:
     # ============================
     # OUTPUT HELPERS
     # ============================
-    def _build_output_path(self, index):
-        name = f"sample_{index + 1}.{self.cfg.outputtype}"
-        return os.path.join(self.cfg.outputfolder, name)
+    def _build_output_path(self, index, variant=None):
+        if variant is None:
+            variant = self.variants[0]
+        name = f"sample_{index + 1}.{variant.fmt}"
+        return os.path.join(variant.folder(self.cfg.outputfolder), name)
 
     def save_image(self, img, path):
         cv2.imwrite(path, img)
@@ -273,12 +343,108 @@ class Generator:
 
         cv2.putText(
             img, str(text), pos,
-            cv2.FONT_HERSHEY_SIMPLEX,
+            FONT,
             scale, (0, 0, 0),
             self.thickness, cv2.LINE_AA
         )
 
+        if self.export_annotations:
+            return self._cached_ink(img, str(text), pos, scale)
+        return None
+
     def draw_checkbox(self, img, field):
         x1, y1, x2, y2 = field["x1"], field["y1"], field["x2"], field["y2"]
-        cv2.line(img, (x1, y1), (x2, y2), (0, 0, 0), 2)
-        cv2.line(img, (x1, y2), (x2, y1), (0, 0, 0), 2)
+        cv2.line(img, (x1, y1), (x2, y2), (0, 0, 0), CHECK_THICKNESS)
+        cv2.line(img, (x1, y2), (x2, y1), (0, 0, 0), CHECK_THICKNESS)
+
+        if not self.export_annotations:
+            return None
+
+        # Both strokes span the field diagonal, so the ink is the field rect
+        # grown by half the stroke width.
+        pad = CHECK_THICKNESS // 2
+        return self._clip_box(img, {
+            "x1": min(x1, x2) - pad,
+            "y1": min(y1, y2) - pad,
+            "x2": max(x1, x2) + pad + 1,
+            "y2": max(y1, y2) + pad + 1,
+        })
+
+    # ============================
+    # INK MEASUREMENT
+    # ============================
+    def _cached_ink(self, img, text, pos, scale):
+        # Values repeat a lot across samples (list picks, fixed positions),
+        # so each text is only rasterized once per position and scale.
+        key = (text, pos, scale, img.shape[:2])
+        ink = self._ink_cache.get(key)
+        if ink is None:
+            if len(self._ink_cache) >= INK_CACHE_SIZE:
+                self._ink_cache.clear()
+            ink = self._ink_cache[key] = self.measure_text(img, text, pos, scale)
+        return copy.deepcopy(ink)
+
+    def measure_text(self, img, text, pos, scale):
+        """Return the tight ink box of ``text`` and one box per word.
+
+        The text is rasterized a second time into a small mask with the same
+        font settings as ``draw_text``, so the boxes match the drawn pixels
+        exactly. Each word gets its own mask at its pen position in the line,
+        so glyphs of neighbouring words never leak into its box. Boxes use
+        exclusive ``x2``/``y2`` and are clipped to the image.
+        """
+        bbox = self._ink_box(img, text, pos, scale)
+
+        words = []
+        start = 0
+        for word in text.split(" "):
+            end = start + len(word)
+            if word:
+                # Pen advance up to the word, without the trailing ink extent
+                # getTextSize adds to a string's width.
+                advance = self._text_width(text[:end], scale) - self._text_width(word, scale)
+                box = self._ink_box(img, word, (pos[0] + advance, pos[1]), scale)
+                if box:
+                    words.append({"text": word, **box})
+            start = end + 1
+
+        return bbox, words
+
+    def _ink_box(self, img, text, pos, scale):
+        (width, height), baseline = cv2.getTextSize(text, FONT, scale, self.thickness)
+        pad = self.thickness + 1
+        origin = (pad, pad + height)
+
+        mask = np.zeros((height + baseline + 2 * pad, width + 2 * pad), np.uint8)
+        cv2.putText(mask, text, origin, FONT, scale, 255, self.thickness, cv2.LINE_AA)
+
+        cols = np.flatnonzero(mask.any(axis=0))
+        rows = np.flatnonzero(mask.any(axis=1))
+        if not cols.size:
+            return None
+
+        offset_x = pos[0] - origin[0]
+        offset_y = pos[1] - origin[1]
+        return self._clip_box(img, {
+            "x1": int(offset_x + cols[0]),
+            "y1": int(offset_y + rows[0]),
+            "x2": int(offset_x + cols[-1] + 1),
+            "y2": int(offset_y + rows[-1] + 1),
+        })
+
+    def _text_width(self, text, scale):
+        if not text:
+            return 0
+        return cv2.getTextSize(text, FONT, scale, self.thickness)[0][0]
+
+    def _clip_box(self, img, box):
+        height, width = img.shape[:2]
+        clipped = {
+            "x1": max(0, min(box["x1"], width)),
+            "y1": max(0, min(box["y1"], height)),
+            "x2": max(0, min(box["x2"], width)),
+            "y2": max(0, min(box["y2"], height)),
+        }
+        if clipped["x2"] <= clipped["x1"] or clipped["y2"] <= clipped["y1"]:
+            return None
+        return clipped
@@ -0,0 +1,163 @@
+import copy
+import math
+import os
+
+import cv2
+
+
+INTERPOLATIONS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "cubic": cv2.INTER_CUBIC,
+    "area": cv2.INTER_AREA,
+    "lanczos": cv2.INTER_LANCZOS4,
+}
+
+COLOR_MODES = ("color", "gray")
+
+BOX_KEYS = ("x1", "y1", "x2", "y2")
+
+
+# ============================
+# OUTPUT VARIANT
+# ============================
+class OutputVariant:
+    """One size/format/color combination every rendered sample is saved in.
+
+    A variant without ``name`` writes straight into the output folder, which
+    is how the generator behaves when no variants are configured.
+    """
+
+    def __init__(self, name=None, fmt="png", long_side=None, width=None, height=None,
+                 scale=None, interpolation="area", color="color"):
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation '{interpolation}' for variant '{name}'")
+        if color not in COLOR_MODES:
+            raise ValueError(f"Unknown color mode '{color}' for variant '{name}'")
+        for key, value in (("long_side", long_side), ("width", width),
+                           ("height", height), ("scale", scale)):
+            if value is not None and (isinstance(value, bool)
+                                      or not isinstance(value, (int, float))
+                                      or not value > 0):
+                raise ValueError(f"'{key}' must be a positive number for variant '{name}', got {value!r}")
+
+        self.name = name
+        self.fmt = fmt
+        self.long_side = long_side
+        self.width = None if width is None else max(1, round(width))
+        self.height = None if height is None else max(1, round(height))
+        self.scale = scale
+        self.interpolation = interpolation
+        self.color = color
+
+    @classmethod
+    def from_config(cls, entry, index, default_format):
+        return cls(
+            name=entry.get("name", f"variant_{index + 1}"),
+            fmt=entry.get("format", default_format),
+            long_side=entry.get("long_side"),
+            width=entry.get("width"),
+            height=entry.get("height"),
+            scale=entry.get("scale"),
+            interpolation=entry.get("interpolation", "area"),
+            color=entry.get("color", "color"),
+        )
+
+    def folder(self, root):
+        return os.path.join(root, self.name) if self.name else root
+
+    def target_size(self, width, height):
+        if self.long_side:
+            factor = self.long_side / max(width, height)
+        elif self.scale:
+            factor = self.scale
+        elif self.width and self.height:
+            return self.width, self.height
+        elif self.width:
+            factor = self.width / width
+        elif self.height:
+            factor = self.height / height
+        else:
+            return width, height
+
+        return max(1, round(width * factor)), max(1, round(height * factor))
+
+    def render(self, img):
+        height, width = img.shape[:2]
+        size = self.target_size(width, height)
+
+        out = img
+        if size != (width, height):
+            out = cv2.resize(out, size, interpolation=INTERPOLATIONS[self.interpolation])
+        if self.color == "gray" and out.ndim == 3:
+            out = cv2.cvtColor(out, cv2.COLOR_BGR2GRAY)
+        return out
+
+    def describe(self, img, source_img):
+        height, width = img.shape[:2]
+        src_height, src_width = source_img.shape[:2]
+        return {
+            "name": self.name,
+            "format": self.fmt,
+            "width": width,
+            "height": height,
+            "scale_x": width / src_width,
+            "scale_y": height / src_height,
+            "interpolation": self.interpolation,
+            "color": self.color,
+        }
+
+    # ============================
+    # COORDINATE SCALING
+    # ============================
+    def scale_fields(self, fields, info):
+        """Scale all boxes of ``fields`` into the variant described by ``info``.
+
+        Boxes that end up empty after scaling and clipping are dropped.
+        """
+        if info["scale_x"] == 1 and info["scale_y"] == 1:
+            return fields
+
+        scaled = copy.deepcopy(fields)
+        for record in scaled:
+            self._scale_entry(record, info)
+        return scaled
+
+    def _scale_entry(self, entry, info):
+        args = (info["scale_x"], info["scale_y"], info["width"], info["height"])
+        for key in ("coords", "bbox"):
+            if entry.get(key):
+                box = scale_box(entry[key], *args)
+                if box:
+                    entry[key] = box
+                else:
+                    del entry[key]
+        if "words" in entry:
+            entry["words"] = [box for box in (scale_box(word, *args) for word in entry["words"]) if box]
+        for child in entry.get("children", []):
+            self._scale_entry(child, info)
+
+
+def scale_box(box, scale_x, scale_y, width, height):
+    """Scale ``box`` outward and clip it to ``width`` x ``height``.
+
+    ``x1``/``y1`` are floored and the exclusive ``x2``/``y2`` are ceiled, so
+    a box never shrinks below the pixels it covered. Returns None when the
+    result is empty.
+    """
+    scaled = dict(box)
+    for key in BOX_KEYS:
+        if key not in box:
+            continue
+        if key[0] == "x":
+            value, limit = box[key] * scale_x, width
+        else:
+            value, limit = box[key] * scale_y, height
+        # Round off float noise first, so 100 * 0.28 doesn't ceil to 29.
+        value = round(value, 6)
+        value = math.floor(value) if key[1] == "1" else math.ceil(value)
+        scaled[key] = max(0, min(value, limit))
+
+    if scaled.get("x2", 1) <= scaled.get("x1", 0) or scaled.get("y2", 1) <= scaled.get("y1", 0):
+        return None
+    return scaled